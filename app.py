@@ -1,29 +1,150 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, session, flash, jsonify
+import os
 import sqlite3
+import time
+import weakref
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from models import get_db_connection as connect_database
+from sharding import ShardRouter
+from maintenance import MaintenanceScheduler
 
-app = Flask(__name__)
-app.secret_key = 'your_secret_key_here'
+bp = Blueprint('main', __name__)
 
-# Database connection helper
+# Apps built in this process, so forked workers can top up their caches
+_apps = weakref.WeakSet()
+
+# Build the app. Under gunicorn --preload this runs once in the master:
+# templates and reference data are loaded here and inherited by every forked
+# worker, while SQLite connections are only ever opened per request, after
+# the fork.
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+    app.secret_key = app.config['SECRET_KEY']
+    
+    shard_dir = app.config['SHARD_DIR']
+    app.extensions['shard_router'] = ShardRouter(shard_dir, app.config['SHARD_WORKERS'],
+                                                 app.config['JOURNAL_SIZE_LIMIT']) if shard_dir else None
+    app.extensions['reference_cache'] = {}
+    app.register_blueprint(bp)
+    
+    warm_caches(app)
+    _apps.add(app)
+    
+    if app.config['MAINTENANCE']:
+        app.extensions['maintenance'] = MaintenanceScheduler(lambda: database_paths(app), app.config).start()
+    
+    return app
+
+# Compile every template and load the reference data up front
+def warm_caches(app):
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    warm_reference_data(app)
+
+# Loads whichever reference data is missing or older than the TTL
+def warm_reference_data(app):
+    with app.app_context():
+        get_districts()
+        get_products()
+
+# Runs in every forked worker. Inherited entries keep their real load time,
+# so one forked long after the master preloaded them reloads them here,
+# before its first request, instead of serving the old snapshot as fresh.
+def refresh_after_fork():
+    for app in list(_apps):
+        try:
+            warm_reference_data(app)
+        except sqlite3.Error:
+            # The first request that needs the data will try again
+            pass
+
+os.register_at_fork(after_in_child=refresh_after_fork)
+
+# Every database file the app uses, for the maintenance jobs
+def database_paths(app):
+    router = app.extensions['shard_router']
+    if router:
+        return router.database_paths()
+    return [app.config['DATABASE']]
+
+def get_router():
+    return current_app.extensions['shard_router']
+
+# Database connection helper (the catalog database when sharded)
 def get_db_connection():
-    conn = sqlite3.connect('ration_shop.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    router = get_router()
+    if router:
+        return router.connect_catalog()
+    return connect_database(current_app.config['DATABASE'], current_app.config['JOURNAL_SIZE_LIMIT'])
 
-# Homepage
-@app.route('/')
-def index():
+# Connection for a district's shops and stock
+def get_district_connection(district_id):
+    router = get_router()
+    if router:
+        return router.connect_district(district_id)
+    return get_db_connection()
+
+# Connection for a single shop's details and stock
+def get_shop_connection(shop_id):
+    router = get_router()
+    if router:
+        return router.connect_shop(shop_id)
+    return get_db_connection()
+
+# Connection for the shop managed by the logged-in branch manager
+def get_manager_connection():
+    router = get_router()
+    if router:
+        conn = router.connect_catalog()
+        user = conn.execute('SELECT shop_id FROM users WHERE user_id = ?', (session['user_id'],)).fetchone()
+        conn.close()
+        return router.connect_shop(user['shop_id'] if user and user['shop_id'] else 0)
+    return get_db_connection()
+
+# Run a query over every shop in the state (fans out across shards)
+def query_all_shops(sql, params=()):
+    router = get_router()
+    if router:
+        return router.fan_out(sql, params)
     conn = get_db_connection()
-    districts = conn.execute('SELECT * FROM districts ORDER BY district_name').fetchall()
+    rows = conn.execute(sql, params).fetchall()
     conn.close()
-    return render_template('index.html', districts=districts)
+    return rows
+
+# Districts and products are read on most pages and rarely change, so each
+# worker keeps them for REFERENCE_CACHE_TTL seconds
+def get_reference_data(name, sql):
+    cache = current_app.extensions['reference_cache']
+    entry = cache.get(name)
+    if entry is None or time.monotonic() - entry[0] >= current_app.config['REFERENCE_CACHE_TTL']:
+        conn = get_db_connection()
+        rows = [dict(row) for row in conn.execute(sql).fetchall()]
+        conn.close()
+        entry = cache[name] = (time.monotonic(), rows)
+    return entry[1]
+
+def get_districts():
+    return get_reference_data('districts', 'SELECT * FROM districts ORDER BY district_name')
+
+def get_products():
+    return get_reference_data('products', 'SELECT * FROM products ORDER BY product_name')
+
+# Homepage
+@bp.route('/')
+def index():
+    return render_template('index.html', districts=get_districts())
 
 # Get shops by district
-@app.route('/shops/<int:district_id>')
+@bp.route('/shops/<int:district_id>')
 def shops(district_id):
-    conn = get_db_connection()
+    conn = get_district_connection(district_id)
     shops = conn.execute('''
         SELECT s.*, d.district_name, u.name as manager_name, u.contact as manager_contact
         FROM shops s 
@@ -38,9 +159,9 @@ def shops(district_id):
     return render_template('shops.html', shops=shops, district=district)
 
 # Get products for a shop
-@app.route('/products/<int:shop_id>')
+@bp.route('/products/<int:shop_id>')
 def products(shop_id):
-    conn = get_db_connection()
+    conn = get_shop_connection(shop_id)
     
     # Get shop details
     shop = conn.execute('''
@@ -65,7 +186,7 @@ def products(shop_id):
     return render_template('products.html', shop=shop, stock=stock)
 
 # Login page
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -82,16 +203,16 @@ def login():
             session['name'] = user['name']
             
             if user['role'] == 'system_admin':
-                return redirect(url_for('admin_dashboard'))
+                return redirect(url_for('main.admin_dashboard'))
             else:
-                return redirect(url_for('branch_dashboard'))
+                return redirect(url_for('main.branch_dashboard'))
         else:
             flash('Invalid username or password', 'danger')
     
     return render_template('login.html')
 
 # Forgot password page
-@app.route('/forgot_password', methods=['GET', 'POST'])
+@bp.route('/forgot_password', methods=['GET', 'POST'])
 def forgot_password():
     if request.method == 'POST':
         email = request.form['email']
@@ -99,33 +220,33 @@ def forgot_password():
         # In a real application, you would send a password reset email here
         # For this demo, we'll just show a success message
         flash('If that email exists in our system, a password reset link has been sent.', 'info')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('forgot_password.html')
 
 # Logout
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # Admin Dashboard
-@app.route('/admin/dashboard')
+@bp.route('/admin/dashboard')
 def admin_dashboard():
     if 'user_id' not in session or session['role'] != 'system_admin':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     conn = get_db_connection()
     
+    # Get districts for the form
+    districts = get_districts()
+    
     # Get counts for dashboard
-    district_count = conn.execute('SELECT COUNT(*) FROM districts').fetchone()[0]
-    shop_count = conn.execute('SELECT COUNT(*) FROM shops').fetchone()[0]
-    product_count = conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+    district_count = len(districts)
+    shop_count = sum(row[0] for row in query_all_shops('SELECT COUNT(*) FROM shops'))
+    product_count = len(get_products())
     manager_count = conn.execute('SELECT COUNT(*) FROM users WHERE role = "branch_manager"').fetchone()[0]
     
-    # Get districts for the form
-    districts = conn.execute('SELECT * FROM districts ORDER BY district_name').fetchall()
-    
     conn.close()
     
     return render_template('admin_dashboard.html', 
@@ -136,12 +257,12 @@ def admin_dashboard():
                           districts=districts)
 
 # Branch Manager Dashboard
-@app.route('/branch/dashboard')
+@bp.route('/branch/dashboard')
 def branch_dashboard():
     if 'user_id' not in session or session['role'] != 'branch_manager':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
-    conn = get_db_connection()
+    conn = get_manager_connection()
     
     # Get shop details for the manager
     shop = conn.execute('''
@@ -175,10 +296,10 @@ def branch_dashboard():
     return render_template('branch_dashboard.html', shop=shop, stock=stock, available_products=available_products)
 
 # Profile page
-@app.route('/profile', methods=['GET', 'POST'])
+@bp.route('/profile', methods=['GET', 'POST'])
 def profile():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     conn = get_db_connection()
     
@@ -203,7 +324,7 @@ def profile():
     return render_template('profile.html', user=user)
 
 # Add new district (Admin only)
-@app.route('/admin/add_district', methods=['POST'])
+@bp.route('/admin/add_district', methods=['POST'])
 def add_district():
     if 'user_id' not in session or session['role'] != 'system_admin':
         return jsonify({'success': False, 'message': 'Unauthorized'})
@@ -212,16 +333,19 @@ def add_district():
     
     conn = get_db_connection()
     try:
-        conn.execute('INSERT INTO districts (district_name) VALUES (?)', (district_name,))
+        cursor = conn.execute('INSERT INTO districts (district_name) VALUES (?)', (district_name,))
         conn.commit()
         conn.close()
+        current_app.extensions['reference_cache'].pop('districts', None)
+        if get_router():
+            get_router().create_shard(cursor.lastrowid)
         return jsonify({'success': True, 'message': 'District added successfully'})
     except sqlite3.IntegrityError:
         conn.close()
         return jsonify({'success': False, 'message': 'District already exists'})
 
 # Add new branch (Admin only)
-@app.route('/admin/add_branch', methods=['POST'])
+@bp.route('/admin/add_branch', methods=['POST'])
 def add_branch():
     if 'user_id' not in session or session['role'] != 'system_admin':
         return jsonify({'success': False, 'message': 'Unauthorized'})
@@ -230,10 +354,12 @@ def add_branch():
     district_id = request.form['district_id']
     address = request.form['address']
     
-    conn = get_db_connection()
+    conn = get_district_connection(district_id)
     try:
-        conn.execute('INSERT INTO shops (shop_name, district_id, address) VALUES (?, ?, ?)', 
-                     (shop_name, district_id, address))
+        # Shop IDs come from the catalog when sharded, else AUTOINCREMENT
+        shop_id = get_router().allocate_shop_id(conn, district_id) if get_router() else None
+        conn.execute('INSERT INTO shops (shop_id, shop_name, district_id, address) VALUES (?, ?, ?, ?)', 
+                     (shop_id, shop_name, district_id, address))
         conn.commit()
         conn.close()
         return jsonify({'success': True, 'message': 'Branch added successfully'})
@@ -242,12 +368,10 @@ def add_branch():
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
 # Hire/assign manager (Admin only)
-@app.route('/admin/hire_manager', methods=['GET', 'POST'])
+@bp.route('/admin/hire_manager', methods=['GET', 'POST'])
 def hire_manager():
     if 'user_id' not in session or session['role'] != 'system_admin':
-        return redirect(url_for('login'))
-    
-    conn = get_db_connection()
+        return redirect(url_for('main.login'))
     
     if request.method == 'POST':
         username = request.form['username']
@@ -257,39 +381,45 @@ def hire_manager():
         contact = request.form['contact']
         shop_id = request.form['shop_id']
         
-        try:
-            # First insert the user
-            conn.execute('''
-                INSERT INTO users (username, email, password, role, shop_id, name, contact)
-                VALUES (?, ?, ?, 'branch_manager', ?, ?, ?)
-            ''', (username, email, password, shop_id, name, contact))
-            
-            # Get the last inserted user ID
-            user_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
-            
-            # Update shop with manager ID
-            conn.execute('UPDATE shops SET manager_id = ? WHERE shop_id = ?', (user_id, shop_id))
-            
-            conn.commit()
-            flash('Manager hired and assigned successfully', 'success')
-        except sqlite3.IntegrityError:
-            flash('Username or email already exists', 'danger')
-        except sqlite3.Error as e:
-            flash(f'Error: {str(e)}', 'danger')
+        conn = get_shop_connection(shop_id)
+        
+        # An unknown (or, when sharded, unroutable) shop would leave a
+        # manager with no shop
+        if not conn.execute('SELECT shop_id FROM shops WHERE shop_id = ?', (shop_id,)).fetchone():
+            flash('Shop not found', 'danger')
+        else:
+            try:
+                # First insert the user
+                conn.execute('''
+                    INSERT INTO users (username, email, password, role, shop_id, name, contact)
+                    VALUES (?, ?, ?, 'branch_manager', ?, ?, ?)
+                ''', (username, email, password, shop_id, name, contact))
+                
+                # Get the last inserted user ID
+                user_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                
+                # Update shop with manager ID
+                conn.execute('UPDATE shops SET manager_id = ? WHERE shop_id = ?', (user_id, shop_id))
+                
+                conn.commit()
+                flash('Manager hired and assigned successfully', 'success')
+            except sqlite3.IntegrityError:
+                flash('Username or email already exists', 'danger')
+            except sqlite3.Error as e:
+                flash(f'Error: {str(e)}', 'danger')
+        conn.close()
     
-    shops = conn.execute('''
+    shops = query_all_shops('''
         SELECT s.*, d.district_name 
         FROM shops s 
         JOIN districts d ON s.district_id = d.district_id 
         WHERE s.manager_id IS NULL
-    ''').fetchall()
-    
-    conn.close()
+    ''')
     
     return render_template('hire_manager.html', shops=shops)
 
 # Update stock quantity (Branch Manager only)
-@app.route('/branch/update_stock', methods=['POST'])
+@bp.route('/branch/update_stock', methods=['POST'])
 def update_stock():
     if 'user_id' not in session or session['role'] != 'branch_manager':
         return jsonify({'success': False, 'message': 'Unauthorized'})
@@ -305,7 +435,7 @@ def update_stock():
     except ValueError:
         return jsonify({'success': False, 'message': 'Invalid quantity value'})
     
-    conn = get_db_connection()
+    conn = get_manager_connection()
     
     try:
         # Get shop ID for the manager
@@ -342,7 +472,7 @@ def update_stock():
         return jsonify({'success': False, 'message': f'Database error: {str(e)}'})
 
 # Add product to shop (Branch Manager only)
-@app.route('/branch/add_product', methods=['POST'])
+@bp.route('/branch/add_product', methods=['POST'])
 def add_product_to_shop():
     if 'user_id' not in session or session['role'] != 'branch_manager':
         return jsonify({'success': False, 'message': 'Unauthorized'})
@@ -358,7 +488,7 @@ def add_product_to_shop():
     except ValueError:
         return jsonify({'success': False, 'message': 'Invalid quantity value'})
     
-    conn = get_db_connection()
+    conn = get_manager_connection()
     
     try:
         # Get shop ID for the manager
@@ -393,33 +523,31 @@ def add_product_to_shop():
         return jsonify({'success': False, 'message': f'Database error: {str(e)}'})
 
 # View all branches and stock status (Admin only)
-@app.route('/admin/view_branches')
+@bp.route('/admin/view_branches')
 def view_branches():
     if 'user_id' not in session or session['role'] != 'system_admin':
-        return redirect(url_for('login'))
-    
-    conn = get_db_connection()
+        return redirect(url_for('main.login'))
     
     # Get all shops with their district and manager info
-    shops = conn.execute('''
+    shops = query_all_shops('''
         SELECT s.*, d.district_name, u.name as manager_name, u.contact as manager_contact
         FROM shops s 
         LEFT JOIN districts d ON s.district_id = d.district_id 
         LEFT JOIN users u ON s.manager_id = u.user_id
         ORDER BY d.district_name, s.shop_name
-    ''').fetchall()
-    
-    conn.close()
+    ''')
+    # Shards each come back sorted, so merge them into one ordering
+    shops.sort(key=lambda s: (s['district_name'] or '', s['shop_name']))
     
     return render_template('view_branches.html', shops=shops)
 
 # View branch details and stock (Admin only)
-@app.route('/admin/branch/<int:shop_id>')
+@bp.route('/admin/branch/<int:shop_id>')
 def admin_branch_details(shop_id):
     if 'user_id' not in session or session['role'] != 'system_admin':
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
-    conn = get_db_connection()
+    conn = get_shop_connection(shop_id)
     
     # Get shop details
     shop = conn.execute('''
@@ -444,19 +572,15 @@ def admin_branch_details(shop_id):
     return render_template('admin_branch_details.html', shop=shop, stock=stock)
 
 # Get all products for AJAX requests
-@app.route('/api/products')
+@bp.route('/api/products')
 def api_products():
-    conn = get_db_connection()
-    products = conn.execute('SELECT * FROM products ORDER BY product_name').fetchall()
-    conn.close()
-    
-    products_list = [{'product_id': p['product_id'], 'product_name': p['product_name']} for p in products]
+    products_list = [{'product_id': p['product_id'], 'product_name': p['product_name']} for p in get_products()]
     return jsonify(products_list)
 
 # Get shop stock for AJAX requests
-@app.route('/api/shop/<int:shop_id>/stock')
+@bp.route('/api/shop/<int:shop_id>/stock')
 def api_shop_stock(shop_id):
-    conn = get_db_connection()
+    conn = get_shop_connection(shop_id)
     
     stock = conn.execute('''
         SELECT p.product_id, p.product_name, st.quantity, st.last_updated
@@ -478,4 +602,4 @@ def api_shop_stock(shop_id):
     return jsonify(stock_list)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run()
\ No newline at end of file
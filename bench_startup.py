@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+
+# Measures how long a freshly forked worker takes to serve its first
+# requests, with the app built once in the parent (gunicorn --preload) versus
+# imported and built inside every worker (no preload). The no-preload run
+# happens before the parent imports the app, so each worker pays for the
+# Flask and app imports just as it would under gunicorn.
+#
+#   python bench_startup.py [workers]
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+PATHS = ['/', '/shops/1', '/products/1', '/api/products']
+
+
+def cold_worker():
+    from app import create_app
+    first_requests(create_app())
+
+
+def first_requests(app):
+    client = app.test_client()
+    for path in PATHS:
+        client.get(path)
+
+
+def run_workers(worker):
+    # Fork each worker like gunicorn does and time it from fork until its
+    # first requests are served
+    timings = []
+    for _ in range(WORKERS):
+        read_fd, write_fd = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker()
+            os.write(write_fd, b'x')
+            os._exit(0)
+        os.close(write_fd)
+        os.read(read_fd, 1)
+        timings.append(time.perf_counter() - started)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    mean = sum(timings) / len(timings)
+    print(f'{label:<12} mean {mean * 1000:7.2f} ms   max {timings[-1] * 1000:7.2f} ms   '
+          f'total {sum(timings) * 1000:8.2f} ms for {len(timings)} workers')
+
+
+if __name__ == '__main__':
+    assert 'app' not in sys.modules
+    report('no preload', run_workers(cold_worker))
+
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    print(f'import {(imported - started) * 1000:.2f} ms, create_app {(created - imported) * 1000:.2f} ms')
+
+    report('preload', run_workers(lambda: first_requests(app)))
@@ -0,0 +1,37 @@
+import os
+
+# Settings read by create_app(); any of them can be overridden by passing a
+# mapping or config object to create_app(), or through the environment
+
+
+class Config:
+    SECRET_KEY = os.environ.get('RATION_SHOP_SECRET_KEY', 'your_secret_key_here')
+    DEBUG = os.environ.get('FLASK_DEBUG') == '1'
+
+    # Single-file database; ignored when SHARD_DIR is set
+    DATABASE = os.environ.get('RATION_SHOP_DB', 'ration_shop.db')
+    # One database per district under this directory (see sharding.py)
+    SHARD_DIR = os.environ.get('RATION_SHOP_SHARD_DIR')
+    # Threads used to fan admin queries out across shards
+    SHARD_WORKERS = int(os.environ.get('RATION_SHOP_SHARD_WORKERS', 8))
+    # Size each connection truncates the WAL file back to after a checkpoint
+    JOURNAL_SIZE_LIMIT = int(os.environ.get('RATION_SHOP_JOURNAL_SIZE_LIMIT', 16 * 1024 * 1024))
+
+    # Seconds each worker keeps districts/products in memory; 0 disables.
+    # A worker forked after the master's copy expired reloads it on fork.
+    REFERENCE_CACHE_TTL = int(os.environ.get('RATION_SHOP_REFERENCE_CACHE_TTL', 60))
+
+    # Run the maintenance jobs inside the app process. Leave this off under
+    # gunicorn --preload and run `python maintenance.py` alongside instead
+    MAINTENANCE = os.environ.get('RATION_SHOP_MAINTENANCE') == '1'
+    # Seconds between maintenance job runs; 0 disables a job
+    BACKUP_INTERVAL = int(os.environ.get('RATION_SHOP_BACKUP_INTERVAL', 6 * 60 * 60))
+    OPTIMIZE_INTERVAL = int(os.environ.get('RATION_SHOP_OPTIMIZE_INTERVAL', 60 * 60))
+    CHECKPOINT_INTERVAL = int(os.environ.get('RATION_SHOP_CHECKPOINT_INTERVAL', 5 * 60))
+    VACUUM_INTERVAL = int(os.environ.get('RATION_SHOP_VACUUM_INTERVAL', 60 * 60))
+    BACKUP_DIR = os.environ.get('RATION_SHOP_BACKUP_DIR', 'backups')
+    # Newest backups kept per database; 0 keeps every backup
+    BACKUP_KEEP = int(os.environ.get('RATION_SHOP_BACKUP_KEEP', 4))
+    BACKUP_PAGES = int(os.environ.get('RATION_SHOP_BACKUP_PAGES', 256))
+    BACKUP_TIMEOUT = int(os.environ.get('RATION_SHOP_BACKUP_TIMEOUT', 10 * 60))
+    VACUUM_PAGES = int(os.environ.get('RATION_SHOP_VACUUM_PAGES', 500))
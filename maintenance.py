@@ -0,0 +1,210 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Periodic database upkeep. Every job runs against each database returned by
+# the paths callable (the single database, or the catalog plus every district
+# shard). Run it in-process with MAINTENANCE in config.py, or as a companion
+# worker with `python maintenance.py` so only one process does the work when
+# gunicorn runs several workers.
+
+logger = logging.getLogger(__name__)
+
+# Intervals, backup location and limits come from config.py (BACKUP_*,
+# *_INTERVAL, VACUUM_PAGES); see MaintenanceScheduler.
+INTERVAL_SETTINGS = {
+    'backup': 'BACKUP_INTERVAL',
+    'optimize': 'OPTIMIZE_INTERVAL',
+    'checkpoint': 'CHECKPOINT_INTERVAL',
+    'vacuum': 'VACUUM_INTERVAL',
+}
+# Pause between backup steps so other connections get the database
+BACKUP_PAUSE = 0.01
+
+
+def _connect(path, timeout=5.0):
+    # mode=rw: a missing shard is an error instead of a new empty file
+    return sqlite3.connect(f'file:{path}?mode=rw', uri=True, timeout=timeout)
+
+
+def backup_database(path, config):
+    backup_dir = config['BACKUP_DIR']
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    target_path = os.path.join(backup_dir, f'{name}-{stamp}.db')
+    # Writes from other connections restart an online backup, so give up on
+    # a busy database after BACKUP_TIMEOUT and try again next run
+    deadline = time.monotonic() + config['BACKUP_TIMEOUT']
+
+    def progress(status, remaining, total):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'backup still had {remaining} of {total} pages left '
+                               f"after {config['BACKUP_TIMEOUT']}s")
+        time.sleep(BACKUP_PAUSE)
+
+    source = _connect(path)
+    target = sqlite3.connect(target_path + '.tmp')
+    completed = False
+    try:
+        # Copy BACKUP_PAGES pages per step; other connections can use the
+        # database between steps, so readers never wait on a whole-file copy
+        source.backup(target, pages=config['BACKUP_PAGES'], progress=progress)
+        completed = True
+    finally:
+        target.close()
+        source.close()
+        if not completed:
+            os.remove(target_path + '.tmp')
+    os.replace(target_path + '.tmp', target_path)
+
+    # Keep only the newest BACKUP_KEEP copies of this database (0 keeps all)
+    keep = config['BACKUP_KEEP']
+    if keep <= 0:
+        return
+    backups = sorted(f for f in os.listdir(backup_dir)
+                     if f.startswith(name + '-') and f.endswith('.db'))
+    for old in backups[:-keep]:
+        os.remove(os.path.join(backup_dir, old))
+
+
+def optimize_database(path, config):
+    conn = _connect(path)
+    # PRAGMA optimize only looks at tables this connection has queried, and a
+    # fresh connection has queried none, so refresh the planner statistics
+    # with ANALYZE directly. analysis_limit samples each index instead of
+    # scanning it, which keeps the run short on large tables.
+    conn.execute('PRAGMA analysis_limit = 1000')
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def checkpoint_database(path, config):
+    # PASSIVE copies what it can without waiting on, or blocking, readers and
+    # writers. Once the WAL is fully copied the next write starts it over,
+    # and that writer's journal_size_limit (set on every app connection)
+    # shrinks the file; anything left behind is picked up by the next run.
+    conn = _connect(path)
+    busy, wal_pages, checkpointed = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+    conn.close()
+    if wal_pages > checkpointed:
+        logger.info('Checkpoint of %s copied %s of %s WAL pages; readers held the rest',
+                    path, checkpointed, wal_pages)
+
+
+def vacuum_database(path, config):
+    conn = _connect(path)
+    # Only frees pages when the file uses auto_vacuum = INCREMENTAL
+    conn.execute(f"PRAGMA incremental_vacuum({int(config['VACUUM_PAGES'])})").fetchall()
+    conn.close()
+
+
+def warm_database(path, config):
+    # Scan every table once so its pages are in the OS cache before the
+    # first requests arrive after a restart
+    conn = _connect(path)
+    tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                          "AND name NOT LIKE 'sqlite_%'").fetchall()
+    for (table,) in tables:
+        conn.execute(f'SELECT COUNT(*) FROM "{table}" NOT INDEXED').fetchone()
+    conn.close()
+
+
+JOBS = {
+    'backup': backup_database,
+    'optimize': optimize_database,
+    'checkpoint': checkpoint_database,
+    'vacuum': vacuum_database,
+    'warmup': warm_database,
+}
+
+
+class MaintenanceScheduler:
+    # config is app.config (or any mapping with the settings in config.py)
+    def __init__(self, database_paths, config):
+        self.database_paths = database_paths
+        self.config = config
+        # Seconds between runs of each job; 0 disables a job
+        self.intervals = {name: config[setting] for name, setting in INTERVAL_SETTINGS.items()}
+        # Per-job run history: runs, last/total duration, last error
+        self.stats = {name: {'runs': 0, 'last_run': None, 'last_duration': None,
+                             'total_duration': 0.0, 'last_error': None}
+                      for name in JOBS}
+        self._next_run = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_job(self, name):
+        started = time.monotonic()
+        error = None
+        try:
+            paths = self.database_paths()
+        except Exception as e:
+            paths = []
+            error = f'listing databases: {e}'
+            logger.warning('Maintenance job %s could not list databases: %s', name, e)
+        for path in paths:
+            try:
+                JOBS[name](path, self.config)
+            except Exception as e:
+                # One locked or missing shard (or a full backup disk) shouldn't
+                # stop the other databases or kill the scheduler thread
+                error = f'{path}: {e}'
+                logger.warning('Maintenance job %s failed on %s: %s', name, path, e)
+        duration = time.monotonic() - started
+
+        stats = self.stats[name]
+        stats['runs'] += 1
+        stats['last_run'] = datetime.now().isoformat(timespec='seconds')
+        stats['last_duration'] = duration
+        stats['total_duration'] += duration
+        stats['last_error'] = error
+        logger.info('Maintenance job %s finished in %.3fs', name, duration)
+        return duration
+
+    def _due_jobs(self, now):
+        return [name for name, interval in self.intervals.items()
+                if interval and self._next_run.get(name, now) <= now]
+
+    def run_forever(self):
+        self.run_job('warmup')
+        now = time.monotonic()
+        for name, interval in self.intervals.items():
+            if interval:
+                self._next_run[name] = now + interval
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for name in self._due_jobs(now):
+                self.run_job(name)
+                self._next_run[name] = time.monotonic() + self.intervals[name]
+            if not self._next_run:
+                break
+            self._stop.wait(max(0, min(self._next_run.values()) - time.monotonic()))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='maintenance', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+if __name__ == '__main__':
+    from app import create_app, database_paths
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    # Same configuration as the web workers, minus the in-process scheduler
+    app = create_app({'MAINTENANCE': False})
+    scheduler = MaintenanceScheduler(lambda: database_paths(app), app.config)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,31 +1,24 @@
 import sqlite3
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 
-def get_db_connection():
-    conn = sqlite3.connect('ration_shop.db')
+# Size the WAL file is truncated back to after a checkpoint. The limit is
+# per connection, so every connection the app opens sets it.
+JOURNAL_SIZE_LIMIT = 16 * 1024 * 1024
+
+def get_db_connection(path='ration_shop.db', journal_size_limit=JOURNAL_SIZE_LIMIT):
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA journal_size_limit = {int(journal_size_limit)}')
     return conn
 
-def init_db():
-    conn = sqlite3.connect('ration_shop.db')
-    cursor = conn.cursor()
-    
-    # Drop tables if they exist (for development)
-    cursor.execute('DROP TABLE IF EXISTS stock')
-    cursor.execute('DROP TABLE IF EXISTS products')
-    cursor.execute('DROP TABLE IF EXISTS shops')
-    cursor.execute('DROP TABLE IF EXISTS users')
-    cursor.execute('DROP TABLE IF EXISTS districts')
-    
-    # Create tables
-    cursor.execute('''
+SCHEMA = [
+    '''
     CREATE TABLE districts (
         district_id INTEGER PRIMARY KEY AUTOINCREMENT,
         district_name TEXT NOT NULL UNIQUE
     )
-    ''')
-    
-    cursor.execute('''
+    ''',
+    '''
     CREATE TABLE users (
         user_id INTEGER PRIMARY KEY AUTOINCREMENT,
         username TEXT NOT NULL UNIQUE,
@@ -37,9 +30,8 @@ def init_db():
         contact TEXT NOT NULL,
         FOREIGN KEY (shop_id) REFERENCES shops (shop_id)
     )
-    ''')
-    
-    cursor.execute('''
+    ''',
+    '''
     CREATE TABLE shops (
         shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
         shop_name TEXT NOT NULL,
@@ -49,16 +41,14 @@ def init_db():
         FOREIGN KEY (district_id) REFERENCES districts (district_id),
         FOREIGN KEY (manager_id) REFERENCES users (user_id)
     )
-    ''')
-    
-    cursor.execute('''
+    ''',
+    '''
     CREATE TABLE products (
         product_id INTEGER PRIMARY KEY AUTOINCREMENT,
         product_name TEXT NOT NULL UNIQUE
     )
-    ''')
-    
-    cursor.execute('''
+    ''',
+    '''
     CREATE TABLE stock (
         stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
         shop_id INTEGER NOT NULL,
@@ -69,12 +59,38 @@ def init_db():
         FOREIGN KEY (product_id) REFERENCES products (product_id),
         UNIQUE(shop_id, product_id)
     )
-    ''')
+    ''',
+]
+
+def init_db(path='ration_shop.db'):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
     
-    # Insert sample data
-    cursor.execute("INSERT INTO districts (district_name) VALUES ('Chennai'), ('Coimbatore'), ('Madurai')")
+    # Lets the maintenance vacuum job return freed pages (new files only)
+    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    # Readers don't block writers; the maintenance job checkpoints the WAL
+    cursor.execute('PRAGMA journal_mode = WAL')
     
-    cursor.execute("INSERT INTO products (product_name) VALUES ('Rice'), ('Wheat'), ('Sugar'), ('Oil'), ('Salt')")
+    # Drop tables if they exist (for clean setup)
+    cursor.execute('DROP TABLE IF EXISTS stock')
+    cursor.execute('DROP TABLE IF EXISTS products')
+    cursor.execute('DROP TABLE IF EXISTS shops')
+    cursor.execute('DROP TABLE IF EXISTS users')
+    cursor.execute('DROP TABLE IF EXISTS districts')
+    
+    # Create tables
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    
+    # Insert sample districts
+    districts = ['Chennai', 'Coimbatore', 'Madurai']
+    for district in districts:
+        cursor.execute("INSERT INTO districts (district_name) VALUES (?)", (district,))
+    
+    # Insert sample products
+    products = ['Rice', 'Wheat', 'Sugar', 'Oil', 'Salt']
+    for product in products:
+        cursor.execute("INSERT INTO products (product_name) VALUES (?)", (product,))
     
     # Insert default admin user (password: admin123)
     admin_password = generate_password_hash('admin123')
@@ -82,12 +98,15 @@ def init_db():
                    ('admin', 'admin@rationshop.com', admin_password, 'system_admin', 'System Administrator', '9876543210'))
     
     # Insert sample shops
-    cursor.execute("INSERT INTO shops (shop_name, district_id, address) VALUES (?, ?, ?)",
-                   ('Anna Nagar Ration Shop', 1, '1st Main Road, Anna Nagar'))
-    cursor.execute("INSERT INTO shops (shop_name, district_id, address) VALUES (?, ?, ?)",
-                   ('T Nagar Ration Shop', 1, 'North Usman Road, T Nagar'))
-    cursor.execute("INSERT INTO shops (shop_name, district_id, address) VALUES (?, ?, ?)",
-                   ('RS Puram Ration Shop', 2, 'DB Road, RS Puram'))
+    shops_data = [
+        ('Anna Nagar Ration Shop', 1, '1st Main Road, Anna Nagar'),
+        ('T Nagar Ration Shop', 1, 'North Usman Road, T Nagar'),
+        ('RS Puram Ration Shop', 2, 'DB Road, RS Puram')
+    ]
+    
+    for shop_name, district_id, address in shops_data:
+        cursor.execute("INSERT INTO shops (shop_name, district_id, address) VALUES (?, ?, ?)",
+                       (shop_name, district_id, address))
     
     # Insert sample branch manager (password: manager123)
     manager_password = generate_password_hash('manager123')
@@ -98,15 +117,27 @@ def init_db():
     cursor.execute("UPDATE shops SET manager_id = 2 WHERE shop_id = 1")
     
     # Insert sample stock data
-    cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (1, 1, 500)")
-    cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (1, 2, 300)")
-    cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (1, 3, 200)")
-    cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (1, 4, 150)")
-    cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (1, 5, 100)")
+    stock_data = [
+        (1, 1, 500),  # Shop 1, Rice, 500kg
+        (1, 2, 300),  # Shop 1, Wheat, 300kg
+        (1, 3, 200),  # Shop 1, Sugar, 200kg
+        (1, 4, 150),  # Shop 1, Oil, 150kg
+        (1, 5, 100),  # Shop 1, Salt, 100kg
+        (2, 1, 400),  # Shop 2, Rice, 400kg
+        (2, 2, 250),  # Shop 2, Wheat, 250kg
+        (2, 3, 150),  # Shop 2, Sugar, 150kg
+        (3, 1, 600),  # Shop 3, Rice, 600kg
+        (3, 4, 200),  # Shop 3, Oil, 200kg
+    ]
+    
+    for shop_id, product_id, quantity in stock_data:
+        cursor.execute("INSERT INTO stock (shop_id, product_id, quantity) VALUES (?, ?, ?)",
+                       (shop_id, product_id, quantity))
     
+    # Commit changes and close connection
     conn.commit()
     conn.close()
-    print("Database initialized successfully!")
 
 if __name__ == '__main__':
-    init_db()
\ No newline at end of file
+    init_db()
+    print("Database initialized successfully!")
\ No newline at end of file
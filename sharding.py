@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from models import JOURNAL_SIZE_LIMIT
+
+# In sharded mode the catalog database holds the shared tables (districts,
+# products, users) and every district gets its own database file holding that
+# district's shops and stock. Shard connections ATTACH the catalog, so the
+# existing queries that join shops/stock with districts/users/products keep
+# working unchanged.
+
+CATALOG_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS districts (
+        district_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        district_name TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        email TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('system_admin', 'branch_manager')),
+        shop_id INTEGER,
+        name TEXT NOT NULL,
+        contact TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name TEXT NOT NULL UNIQUE
+    )
+    ''',
+    # Shop IDs are handed out here so they stay unique across all shards
+    '''
+    CREATE TABLE IF NOT EXISTS shop_directory (
+        shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        district_id INTEGER NOT NULL
+    )
+    ''',
+    # Where each district's shard lives; update a row to move a shard
+    '''
+    CREATE TABLE IF NOT EXISTS shard_map (
+        district_id INTEGER PRIMARY KEY,
+        db_path TEXT NOT NULL
+    )
+    ''',
+]
+
+# Foreign keys cannot point across database files, so the shard tables only
+# keep the ID columns that refer to catalog rows.
+SHARD_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS shops (
+        shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        shop_name TEXT NOT NULL,
+        district_id INTEGER NOT NULL,
+        manager_id INTEGER,
+        address TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS stock (
+        stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        shop_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity REAL NOT NULL DEFAULT 0,
+        last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (shop_id) REFERENCES shops (shop_id),
+        UNIQUE(shop_id, product_id)
+    )
+    ''',
+]
+
+CATALOG_FILE = 'catalog.db'
+
+
+def _parse_id(value):
+    # IDs often arrive as raw form values; anything non-numeric routes nowhere
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ShardRouter:
+    def __init__(self, shard_dir, max_workers=8, journal_size_limit=JOURNAL_SIZE_LIMIT):
+        self.shard_dir = shard_dir
+        self.catalog_path = os.path.join(shard_dir, CATALOG_FILE)
+        self.max_workers = max_workers
+        self.journal_size_limit = int(journal_size_limit)
+        # Created on first use in each process: a pool started in the
+        # gunicorn master before fork would have no threads in the workers
+        self._executor = None
+        self._executor_pid = None
+        # Shops never change district, so that lookup is cached per worker.
+        # Shard paths are not: they are read from shard_map on every connect
+        # so a moved shard is picked up by all workers straight away.
+        self._shop_districts = {}
+
+    @property
+    def executor(self):
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def connect_catalog(self):
+        conn = sqlite3.connect(self.catalog_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA journal_size_limit = {self.journal_size_limit}')
+        return conn
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        conn.execute('ATTACH DATABASE ? AS catalog', (self.catalog_path,))
+        # Applies to the shard and the attached catalog
+        conn.execute(f'PRAGMA journal_size_limit = {self.journal_size_limit}')
+        return conn
+
+    def _connect_empty(self):
+        # Stand-in for an unknown shop or district: lookups return nothing
+        conn = self._connect(':memory:')
+        for statement in SHARD_SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def shard_path(self, district_id):
+        district_id = _parse_id(district_id)
+        if district_id is None:
+            return None
+        conn = sqlite3.connect(self.catalog_path)
+        row = conn.execute('SELECT db_path FROM shard_map WHERE district_id = ?',
+                           (district_id,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def district_for_shop(self, shop_id):
+        shop_id = _parse_id(shop_id)
+        if shop_id is None:
+            return None
+        if shop_id not in self._shop_districts:
+            conn = sqlite3.connect(self.catalog_path)
+            row = conn.execute('SELECT district_id FROM shop_directory WHERE shop_id = ?',
+                               (shop_id,)).fetchone()
+            conn.close()
+            if not row:
+                return None
+            self._shop_districts[shop_id] = row[0]
+        return self._shop_districts[shop_id]
+
+    def connect_district(self, district_id):
+        path = self.shard_path(district_id)
+        if path is None:
+            return self._connect_empty()
+        return self._connect(path)
+
+    def connect_shop(self, shop_id):
+        district_id = self.district_for_shop(shop_id)
+        if district_id is None:
+            return self._connect_empty()
+        return self.connect_district(district_id)
+
+    def all_districts(self):
+        conn = sqlite3.connect(self.catalog_path)
+        rows = conn.execute('SELECT district_id FROM shard_map ORDER BY district_id').fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def database_paths(self):
+        conn = sqlite3.connect(self.catalog_path)
+        rows = conn.execute('SELECT db_path FROM shard_map ORDER BY district_id').fetchall()
+        conn.close()
+        return [self.catalog_path] + [row[0] for row in rows]
+
+    def create_shard(self, district_id, path=None):
+        district_id = int(district_id)
+        if path is None:
+            path = os.path.join(self.shard_dir, f'district_{district_id}.db')
+        shard = sqlite3.connect(path)
+        shard.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        shard.execute('PRAGMA journal_mode = WAL')
+        for statement in SHARD_SCHEMA:
+            shard.execute(statement)
+        shard.commit()
+        shard.close()
+
+        conn = sqlite3.connect(self.catalog_path)
+        conn.execute('INSERT OR REPLACE INTO shard_map (district_id, db_path) VALUES (?, ?)',
+                     (district_id, path))
+        conn.commit()
+        conn.close()
+        return path
+
+    def allocate_shop_id(self, conn, district_id):
+        # conn is a shard connection, so the new shop and its directory entry
+        # are committed together. In WAL mode each file commits atomically on
+        # its own; a crash in between can at worst leave an unused shop ID.
+        if self.shard_path(district_id) is None:
+            raise sqlite3.IntegrityError('District does not exist')
+        cursor = conn.execute('INSERT INTO catalog.shop_directory (district_id) VALUES (?)',
+                              (int(district_id),))
+        self._shop_districts[cursor.lastrowid] = int(district_id)
+        return cursor.lastrowid
+
+    def _query_shard(self, district_id, sql, params):
+        conn = self.connect_district(district_id)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def fan_out(self, sql, params=()):
+        # Run the same query on every shard in parallel and concatenate the
+        # rows; callers re-sort or aggregate the combined result
+        futures = [self.executor.submit(self._query_shard, district_id, sql, params)
+                   for district_id in self.all_districts()]
+        rows = []
+        for future in futures:
+            rows.extend(future.result())
+        return rows
+
+    def move_shard(self, district_id, new_path):
+        # Copies the shard with the online backup API, then repoints the
+        # catalog; every worker connects to new_path from its next request.
+        # The old file holds a write lock for the whole move, so writers wait
+        # (or fail once their busy timeout runs out) instead of committing to
+        # a file that is about to be abandoned. Before the lock is released
+        # the old tables are renamed, so a writer that resolved the old path
+        # just before the switch gets "no such table" rather than losing data.
+        old_path = self.shard_path(district_id)
+        if old_path is None:
+            raise KeyError(district_id)
+        source = sqlite3.connect(old_path, isolation_level=None)
+        try:
+            source.execute('BEGIN IMMEDIATE')
+            # A connection can't back up a file it holds the write lock on, so
+            # copy through a second, read-only connection. With every other
+            # writer locked out its snapshot is the final state of the shard.
+            reader = sqlite3.connect(old_path)
+            target = sqlite3.connect(new_path)
+            reader.backup(target)
+            target.close()
+            reader.close()
+
+            conn = sqlite3.connect(self.catalog_path)
+            conn.execute('UPDATE shard_map SET db_path = ? WHERE district_id = ?',
+                         (new_path, int(district_id)))
+            conn.commit()
+            conn.close()
+
+            source.execute('ALTER TABLE stock RENAME TO moved_stock')
+            source.execute('ALTER TABLE shops RENAME TO moved_shops')
+            source.execute('COMMIT')
+        finally:
+            if source.in_transaction:
+                source.execute('ROLLBACK')
+            source.close()
+        return old_path
+
+
+def split_database(source_path, shard_dir):
+    # Build a catalog plus one shard per district from an existing
+    # single-file database (e.g. one created by init_db.py)
+    os.makedirs(shard_dir, exist_ok=True)
+    router = ShardRouter(shard_dir)
+
+    catalog = sqlite3.connect(router.catalog_path)
+    catalog.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    catalog.execute('PRAGMA journal_mode = WAL')
+    for statement in CATALOG_SCHEMA:
+        catalog.execute(statement)
+    catalog.execute('ATTACH DATABASE ? AS source', (source_path,))
+    catalog.execute('INSERT INTO districts SELECT district_id, district_name FROM source.districts')
+    catalog.execute('INSERT INTO products SELECT product_id, product_name FROM source.products')
+    catalog.execute('''
+        INSERT INTO users
+        SELECT user_id, username, email, password, role, shop_id, name, contact FROM source.users
+    ''')
+    catalog.execute('INSERT INTO shop_directory SELECT shop_id, district_id FROM source.shops')
+    districts = [row[0] for row in catalog.execute('SELECT district_id FROM districts')]
+    catalog.commit()
+    catalog.close()
+
+    for district_id in districts:
+        path = router.create_shard(district_id)
+        shard = sqlite3.connect(path)
+        shard.execute('ATTACH DATABASE ? AS source', (source_path,))
+        shard.execute('''
+            INSERT INTO shops
+            SELECT shop_id, shop_name, district_id, manager_id, address
+            FROM source.shops WHERE district_id = ?
+        ''', (district_id,))
+        shard.execute('''
+            INSERT INTO stock
+            SELECT st.stock_id, st.shop_id, st.product_id, st.quantity, st.last_updated
+            FROM source.stock st
+            JOIN source.shops s ON st.shop_id = s.shop_id
+            WHERE s.district_id = ?
+        ''', (district_id,))
+        shard.commit()
+        shard.close()
+
+    print(f"Split {source_path} into {len(districts)} district shards in {shard_dir}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python sharding.py <source.db> <shard_dir>')
+        sys.exit(1)
+    if os.path.exists(os.path.join(sys.argv[2], CATALOG_FILE)):
+        print(f'{sys.argv[2]} already contains a catalog; remove it first')
+        sys.exit(1)
+    split_database(sys.argv[1], sys.argv[2])
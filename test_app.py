@@ -0,0 +1,75 @@
+import os
+import sqlite3
+
+import pytest
+
+import app as app_module
+from app import create_app
+from models import init_db
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'ration_shop.db')
+    init_db(path)
+    return path
+
+
+def add_district(database, name):
+    conn = sqlite3.connect(database)
+    conn.execute('INSERT INTO districts (district_name) VALUES (?)', (name,))
+    conn.commit()
+    conn.close()
+
+
+def test_config_overrides_defaults(database):
+    app = create_app({'DATABASE': database, 'REFERENCE_CACHE_TTL': 5})
+    assert app.config['DATABASE'] == database
+    assert app.config['REFERENCE_CACHE_TTL'] == 5
+    # Settings not overridden keep the config.py defaults
+    assert app.config['SHARD_DIR'] is None and app.config['SHARD_WORKERS'] == 8
+
+    class Settings:
+        DATABASE = database
+        SECRET_KEY = 'from-object'
+        lowercase_is_ignored = True
+
+    app = create_app(Settings)
+    assert app.secret_key == 'from-object'
+    assert 'lowercase_is_ignored' not in app.config
+
+
+def test_warm_cache_serves_reference_data_without_the_database(database):
+    app = create_app({'DATABASE': database})
+    os.remove(database)
+    client = app.test_client()
+
+    assert b'Chennai' in client.get('/').data
+    assert [p['product_name'] for p in client.get('/api/products').json] == ['Oil', 'Rice', 'Salt', 'Sugar', 'Wheat']
+    assert not os.path.exists(database)
+
+
+def test_reference_cache_expires_after_ttl(database):
+    cached = create_app({'DATABASE': database, 'REFERENCE_CACHE_TTL': 60})
+    uncached = create_app({'DATABASE': database, 'REFERENCE_CACHE_TTL': 0})
+    add_district(database, 'Salem')
+
+    assert b'Salem' not in cached.test_client().get('/').data
+    assert b'Salem' in uncached.test_client().get('/').data
+
+
+def test_fork_reloads_only_expired_reference_data(database):
+    app = create_app({'DATABASE': database, 'REFERENCE_CACHE_TTL': 60})
+    cache = app.extensions['reference_cache']
+    add_district(database, 'Salem')
+
+    # districts were loaded by a master that started long ago; products are fresh
+    loaded, rows = cache['districts']
+    cache['districts'] = (loaded - 120, rows)
+    products_loaded = cache['products'][0]
+
+    app_module.refresh_after_fork()
+
+    assert 'Salem' in [d['district_name'] for d in cache['districts'][1]]
+    assert cache['districts'][0] > loaded
+    assert cache['products'][0] == products_loaded
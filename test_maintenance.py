@@ -0,0 +1,127 @@
+import os
+import sqlite3
+
+import pytest
+
+from config import Config
+from maintenance import MaintenanceScheduler, backup_database, checkpoint_database, optimize_database
+from models import get_db_connection, init_db
+
+
+@pytest.fixture
+def config(tmp_path):
+    settings = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    settings['BACKUP_DIR'] = str(tmp_path / 'backups')
+    return settings
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'ration_shop.db')
+    init_db(path)
+    return path
+
+
+def test_optimize_fills_planner_statistics(database, config):
+    conn = sqlite3.connect(database)
+    conn.executemany('INSERT INTO products (product_name) VALUES (?)',
+                     [(f'Product {i}',) for i in range(5000)])
+    conn.commit()
+    conn.close()
+
+    optimize_database(database, config)
+
+    conn = sqlite3.connect(database)
+    stats = dict(conn.execute('SELECT tbl, stat FROM sqlite_stat1').fetchall())
+    conn.close()
+    assert 'products' in stats and 'stock' in stats
+
+
+def test_checkpoint_does_not_block_writers_and_bounds_the_wal(database, config, tmp_path):
+    app_conn = get_db_connection(database, journal_size_limit=64 * 1024)
+    app_conn.executemany('INSERT INTO products (product_name) VALUES (?)',
+                         [(f'Product {i}' * 20,) for i in range(5000)])
+    app_conn.commit()
+    wal = tmp_path / 'ration_shop.db-wal'
+    assert wal.stat().st_size > 64 * 1024
+
+    reader = sqlite3.connect(database)
+    reader.execute('BEGIN')
+    reader.execute('SELECT COUNT(*) FROM products').fetchone()
+    writer = sqlite3.connect(database, timeout=0)
+    checkpoint_database(database, config)
+    writer.execute("INSERT INTO districts (district_name) VALUES ('Salem')")
+    writer.commit()
+    writer.close()
+    reader.rollback()
+    reader.close()
+
+    checkpoint_database(database, config)
+    app_conn.execute("INSERT INTO districts (district_name) VALUES ('Erode')")
+    app_conn.commit()
+    assert wal.stat().st_size <= 64 * 1024
+    app_conn.close()
+
+
+def test_backup_keeps_the_newest_copies(database, config):
+    config['BACKUP_KEEP'] = 2
+    for _ in range(4):
+        backup_database(database, config)
+    backups = sorted(os.listdir(config['BACKUP_DIR']))
+    assert len(backups) == 2
+
+    conn = sqlite3.connect(os.path.join(config['BACKUP_DIR'], backups[-1]))
+    assert conn.execute('SELECT COUNT(*) FROM stock').fetchone() == (10,)
+    conn.close()
+
+    config['BACKUP_KEEP'] = 0
+    for _ in range(3):
+        backup_database(database, config)
+    assert len(os.listdir(config['BACKUP_DIR'])) == 5
+
+
+def test_backup_timeout_fails_and_removes_partial_file(database, config):
+    config['BACKUP_TIMEOUT'] = -1
+    config['BACKUP_PAGES'] = 1
+    with pytest.raises(TimeoutError):
+        backup_database(database, config)
+    assert os.listdir(config['BACKUP_DIR']) == []
+
+
+def test_run_job_records_errors_per_database(database, config, tmp_path):
+    missing = str(tmp_path / 'missing.db')
+    scheduler = MaintenanceScheduler(lambda: [missing, database], config)
+    scheduler.run_job('backup')
+
+    stats = scheduler.stats['backup']
+    assert stats['runs'] == 1 and stats['last_duration'] is not None
+    assert stats['last_error'].startswith(missing)
+    # The missing shard was not created and the good database was still backed up
+    assert not os.path.exists(missing)
+    assert len(os.listdir(config['BACKUP_DIR'])) == 1
+
+    config['BACKUP_DIR'] = os.path.join(database, 'backups')
+    scheduler.run_job('backup')
+    assert 'Not a directory' in scheduler.stats['backup']['last_error']
+
+    failing = MaintenanceScheduler(lambda: 1 / 0, config)
+    failing.run_job('vacuum')
+    assert failing.stats['vacuum']['last_error'].startswith('listing databases')
+
+
+def test_jobs_run_on_their_interval(database, config):
+    config.update(BACKUP_INTERVAL=0, OPTIMIZE_INTERVAL=60, CHECKPOINT_INTERVAL=5, VACUUM_INTERVAL=60)
+    scheduler = MaintenanceScheduler(lambda: [database], config)
+    scheduler._next_run = {'optimize': 160, 'checkpoint': 105, 'vacuum': 100}
+
+    assert scheduler._due_jobs(90) == []
+    assert scheduler._due_jobs(100) == ['vacuum']
+    assert sorted(scheduler._due_jobs(200)) == ['checkpoint', 'optimize', 'vacuum']
+
+
+def test_scheduler_thread_runs_warmup_and_stops(database, config):
+    config.update(BACKUP_INTERVAL=0, OPTIMIZE_INTERVAL=0, CHECKPOINT_INTERVAL=1, VACUUM_INTERVAL=0)
+    scheduler = MaintenanceScheduler(lambda: [database], config).start()
+    scheduler.stop()
+    assert scheduler.stats['warmup']['runs'] == 1
+    assert scheduler.stats['backup']['runs'] == 0
@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app import create_app
+from models import init_db
+from sharding import ShardRouter, split_database
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    source = tmp_path / 'ration_shop.db'
+    init_db(str(source))
+    split_database(str(source), str(tmp_path / 'shards'))
+    return tmp_path / 'shards'
+
+
+@pytest.fixture
+def client(shard_dir):
+    app = create_app({'SHARD_DIR': str(shard_dir), 'MAINTENANCE': False})
+    return app.test_client()
+
+
+def login(client, username, password):
+    client.post('/login', data={'username': username, 'password': password})
+
+
+def shard_rows(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def test_split_puts_shops_in_their_district_shard(shard_dir):
+    assert shard_rows(shard_dir / 'district_1.db', 'SELECT shop_id FROM shops ORDER BY shop_id') == [(1,), (2,)]
+    assert shard_rows(shard_dir / 'district_2.db', 'SELECT shop_id FROM shops') == [(3,)]
+    assert shard_rows(shard_dir / 'district_3.db', 'SELECT shop_id FROM shops') == []
+    assert shard_rows(shard_dir / 'district_2.db', 'SELECT COUNT(*) FROM stock') == [(2,)]
+
+
+def test_pages_read_from_the_right_shard(client):
+    page = client.get('/shops/1').data
+    assert b'Anna Nagar Ration Shop' in page and b'RS Puram Ration Shop' not in page
+    assert b'RS Puram Ration Shop' in client.get('/products/3').data
+
+    stock = client.get('/api/shop/3/stock').json
+    assert {s['product_name']: s['quantity'] for s in stock} == {'Oil': 200, 'Rice': 600}
+    assert client.get('/api/shop/99/stock').json == []
+
+
+def test_add_branch_allocates_id_and_writes_to_district_shard(client, shard_dir):
+    login(client, 'admin', 'admin123')
+    result = client.post('/admin/add_branch', data={'shop_name': 'Madurai Shop', 'district_id': '3',
+                                                    'address': 'Main Road'}).json
+    assert result['success']
+
+    assert shard_rows(shard_dir / 'district_3.db', 'SELECT shop_id, shop_name FROM shops') == [(4, 'Madurai Shop')]
+    assert shard_rows(shard_dir / 'catalog.db', 'SELECT district_id FROM shop_directory WHERE shop_id = 4') == [(3,)]
+
+    result = client.post('/admin/add_branch', data={'shop_name': 'Nowhere', 'district_id': '42',
+                                                    'address': ''}).json
+    assert not result['success']
+
+    result = client.post('/admin/add_branch', data={'shop_name': 'Nowhere', 'district_id': 'abc',
+                                                    'address': ''}).json
+    assert not result['success']
+
+
+def test_hire_manager_updates_catalog_and_shard(client, shard_dir):
+    login(client, 'admin', 'admin123')
+    client.post('/admin/hire_manager', data={'username': 'manager3', 'email': 'm3@rationshop.com',
+                                             'password': 'secret', 'name': 'Manager Three',
+                                             'contact': '1234567890', 'shop_id': '3'})
+
+    user_id = shard_rows(shard_dir / 'catalog.db', "SELECT user_id FROM users WHERE username = 'manager3'")[0][0]
+    assert shard_rows(shard_dir / 'district_2.db', 'SELECT manager_id FROM shops WHERE shop_id = 3') == [(user_id,)]
+
+    for shop_id in ('99', 'abc'):
+        response = client.post('/admin/hire_manager', data={'username': 'nobody', 'email': 'nobody@rationshop.com',
+                                                            'password': 'secret', 'name': 'Nobody',
+                                                            'contact': '1234567890', 'shop_id': shop_id})
+        assert response.status_code == 200 and b'Shop not found' in response.data
+    assert shard_rows(shard_dir / 'catalog.db', "SELECT COUNT(*) FROM users WHERE username = 'nobody'") == [(0,)]
+
+    client.get('/logout')
+    login(client, 'manager3', 'secret')
+    assert client.post('/branch/update_stock', data={'product_id': '1', 'quantity': '42'}).json['success']
+    assert shard_rows(shard_dir / 'district_2.db',
+                      'SELECT quantity FROM stock WHERE shop_id = 3 AND product_id = 1') == [(42,)]
+
+
+def test_fan_out_covers_every_shard(shard_dir):
+    router = ShardRouter(str(shard_dir))
+    shops = router.fan_out('SELECT shop_id FROM shops')
+    assert sorted(row['shop_id'] for row in shops) == [1, 2, 3]
+
+
+def test_moved_shard_is_seen_by_other_routers(shard_dir, tmp_path):
+    worker = ShardRouter(str(shard_dir))
+    assert worker.shard_path(1) == str(shard_dir / 'district_1.db')
+
+    new_path = str(tmp_path / 'district_1.db')
+    ShardRouter(str(shard_dir)).move_shard(1, new_path)
+
+    conn = worker.connect_shop(1)
+    conn.execute('UPDATE stock SET quantity = 1 WHERE shop_id = 1 AND product_id = 1')
+    conn.commit()
+    conn.close()
+    assert shard_rows(new_path, 'SELECT quantity FROM stock WHERE shop_id = 1 AND product_id = 1') == [(1,)]
+
+
+def test_writes_during_a_move_are_not_lost(shard_dir, tmp_path):
+    worker = ShardRouter(str(shard_dir))
+    stale = worker.connect_shop(1)
+    stop = threading.Event()
+    committed = []
+
+    def write():
+        quantity = 0
+        while not stop.is_set():
+            quantity += 1
+            conn = worker.connect_shop(1)
+            try:
+                conn.execute('UPDATE stock SET quantity = ? WHERE shop_id = 1 AND product_id = 1', (quantity,))
+                conn.commit()
+                committed.append(quantity)
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                conn.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while len(committed) < 20:
+        pass
+    new_path = str(tmp_path / 'district_1.db')
+    ShardRouter(str(shard_dir)).move_shard(1, new_path)
+    while len(committed) < 40:
+        pass
+    stop.set()
+    writer.join()
+
+    # Every acknowledged write is in the new file, none only in the old one
+    assert shard_rows(new_path, 'SELECT quantity FROM stock WHERE shop_id = 1 AND product_id = 1') == [(committed[-1],)]
+    with pytest.raises(sqlite3.OperationalError, match='no such table'):
+        stale.execute('UPDATE stock SET quantity = 0 WHERE shop_id = 1')
@@ -0,0 +1,5 @@
+from app import create_app
+
+# Entry point for gunicorn, e.g.
+#   gunicorn --preload --workers 32 wsgi:app
+app = create_app()